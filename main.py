@@ -1,26 +1,35 @@
 import asyncio
 import os
+import sys
+import signal
 import logging
 from datetime import datetime
-from pathlib import Path
-from typing import Optional, Dict, Any
-import uuid
+from typing import Optional, Dict, Any, AsyncIterator, Callable, List, Tuple
+import re
+import secrets
 import time
-import math
+import functools
 import threading
+import socket
+import sqlite3
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 
-from pyrogram import filters, types
+from pyrogram import filters
 from pyrogram.client import Client
+from pyrogram.errors import FloodWait
 import boto3
 from botocore.exceptions import ClientError
 from botocore.config import Config
-from boto3.s3.transfer import TransferConfig
-import aiofiles
-from asyncio_throttle import Throttler
-from flask import Flask, render_template, request, redirect, url_for, send_file, jsonify, Response
+from botocore.awsrequest import AWSHTTPSConnection, AWSHTTPSConnectionPool
+import aiofiles.os
+import orjson
+from flask import Flask, redirect, request, Response
 from flask_cors import CORS
-import requests
-from urllib.parse import quote
+from werkzeug.http import parse_etags
+from hypercorn.asyncio import serve
+from hypercorn.config import Config as HypercornConfig
+from hypercorn.middleware import AsyncioWSGIMiddleware
 
 # Configure logging
 logging.basicConfig(
@@ -29,90 +38,129 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-class ProgressTracker:
-    """Real-time progress tracking for file operations."""
+# Optional photo sent with the /start message
+_START_PIC = os.getenv("START_PIC")
+
+MIN_PART_SIZE = 8 * 1024 * 1024  # S3 rejects non-final parts under 5MB
+SOCKET_SNDBUF = 4 * 1024 * 1024  # 4MB kernel send buffer for S3 connections
+HTTP_BLOCKSIZE = 1024 * 1024  # Bytes per socket write of a request body
+URL_CACHE_SIZE = 4096  # Signed links kept before the oldest are dropped
+LINK_TTL = 86400  # Lifetime of the streaming links handed to users and the web page
+LINK_REFRESH_INTERVAL = 600  # Seconds between sweeps for stored links nearing expiry
+LINK_REFRESH_WINDOW = LINK_TTL // 2  # Stored links are re-signed, or not handed out, with less than this left
+RECENT_FILES = 20  # Files listed on the web page, which get their links refreshed
+FILES_CACHE_CONTROL = 'private, max-age=0, must-revalidate'  # /api/files is revalidated on every poll
+SSE_KEEPALIVE = 30  # Seconds between comments that keep idle /events streams open
+
+# Characters allowed in the file name part of an object key
+_UNSAFE_NAME_CHARS = re.compile(r'[^\w.\-]')
+
+def _env_int(name: str, default: int) -> int:
+    """Read an integer setting from the environment."""
+    value = os.getenv(name)
+    return int(value) if value else default
+
+_SIZE_UNITS = ("B", "KB", "MB", "GB", "TB")
+_POW1024 = (1, 1024, 1024 ** 2, 1024 ** 3, 1024 ** 4)
+
+def _format_size(size_bytes: int) -> str:
+    """Format file size in human readable format."""
+    if size_bytes == 0:
+        return "0 B"
     
-    def __init__(self, total_size: int, update_interval: float = 2.0):
+    # bit_length gives floor(log2) exactly, so //10 is floor(log1024)
+    i = min((size_bytes.bit_length() - 1) // 10, len(_POW1024) - 1)
+    s = round(size_bytes / _POW1024[i], 2)
+    return f"{s} {_SIZE_UNITS[i]}"
+
+def _format_time(seconds: float) -> str:
+    """Format time in MM:SS format."""
+    # A single chained comparison rejects negatives, inf and NaN alike
+    if not 0 <= seconds < float('inf'):
+        return "--:--"
+    
+    minutes = int(seconds // 60)
+    seconds = int(seconds % 60)
+    return f"{minutes:02d}:{seconds:02d}"
+
+_BAR_LENGTH = 20
+_FULL_BAR = "█" * _BAR_LENGTH
+_EMPTY_BAR = "░" * _BAR_LENGTH
+
+def _create_progress_bar(percentage: float) -> str:
+    """Create visual progress bar."""
+    filled = min(max(int(percentage / 100 * _BAR_LENGTH), 0), _BAR_LENGTH)
+    return f"[{_FULL_BAR[:filled]}{_EMPTY_BAR[filled:]}] {percentage:.1f}%"
+
+class TunedHTTPSConnection(AWSHTTPSConnection):
+    """HTTPS connection with Nagle disabled, a large send buffer and 1MB body writes."""
+    
+    def __init__(self, *args, **kwargs):
+        # urllib3's pool manager always passes its 16KB default, so override it
+        kwargs['blocksize'] = HTTP_BLOCKSIZE
+        super().__init__(*args, **kwargs)
+    
+    def _new_conn(self):
+        sock = super()._new_conn()
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SOCKET_SNDBUF)
+        return sock
+
+class TunedHTTPSConnectionPool(AWSHTTPSConnectionPool):
+    ConnectionCls = TunedHTTPSConnection
+
+def _tune_s3_client(client):
+    """Make the client open its HTTPS connections through TunedHTTPSConnection."""
+    # The pool manager holds this same dict, so update it in place
+    client._endpoint.http_session._pool_classes_by_scheme['https'] = TunedHTTPSConnectionPool
+    return client
+
+class DownloadProgress:
+    """Progress tracking for Telegram file transfers."""
+    
+    def __init__(self, total_size, edit):
         self.total_size = total_size
-        self.update_interval = update_interval
-        self.bytes_transferred = 0
-        self.last_update_time = 0
-        self.start_time = time.time()
-        self.lock = threading.Lock()
-        self.current_progress = None
-    
-    def __call__(self, bytes_amount: int):
-        """Progress callback for S3 transfers."""
-        with self.lock:
-            self.bytes_transferred += bytes_amount
-            current_time = time.time()
+        self.edit = edit
+        self.downloaded = 0
+        self.start_time = time.monotonic()
+        self.last_update = 0.0
+        # Bytes reported at the last emitted update
+        self._emitted_bytes = 0
+        self._emit_threshold = 1024 * 1024
+    
+    async def update(self, current, total):
+        self.downloaded = current
+        # Cheap byte check first so most chunks skip the clock read entirely
+        if current - self._emitted_bytes < self._emit_threshold:
+            return
+        current_time = time.monotonic()
+        
+        # Update every 1.5 seconds
+        if current_time - self.last_update > 1.5:
+            percentage = (current / total) * 100
+            elapsed = current_time - self.start_time
             
-            # Update progress every interval or at completion
-            if (current_time - self.last_update_time > self.update_interval or 
-                self.bytes_transferred >= self.total_size):
-                
-                percentage = (self.bytes_transferred / self.total_size) * 100
-                elapsed_time = current_time - self.start_time
-                
-                # Calculate speed
-                if elapsed_time > 0:
-                    speed_bps = self.bytes_transferred / elapsed_time
-                    speed_mbps = speed_bps / (1024 * 1024)
-                    
-                    # Estimate time remaining
-                    if self.bytes_transferred > 0:
-                        eta_seconds = (self.total_size - self.bytes_transferred) / speed_bps
-                        eta_str = self._format_time(eta_seconds)
-                    else:
-                        eta_str = "--:--"
-                else:
-                    speed_mbps = 0
-                    eta_str = "--:--"
-                
-                # Create progress bar
-                progress_bar = self._create_progress_bar(percentage)
-                
-                progress_text = f"⚡ **TURBO UPLOAD** ⚡\n\n"
-                progress_text += f"{progress_bar}\n"
-                progress_text += f"📊 **{percentage:.1f}%** ({self._format_size(self.bytes_transferred)} / {self._format_size(self.total_size)})\n"
-                progress_text += f"🚀 **Speed:** {speed_mbps:.2f} MB/s\n"
-                progress_text += f"⏱️ **ETA:** {eta_str}\n"
-                progress_text += f"⚡ **High-speed cloud upload in progress...**"
-                
-                # Store progress for async update
-                self.current_progress = progress_text
-                self.last_update_time = current_time
-    
-    def get_progress(self):
-        """Get current progress text."""
-        with self.lock:
-            return self.current_progress
-    
-    def _create_progress_bar(self, percentage: float, length: int = 20) -> str:
-        """Create visual progress bar."""
-        filled = int(percentage / 100 * length)
-        bar = "█" * filled + "░" * (length - filled)
-        return f"[{bar}] {percentage:.1f}%"
-    
-    def _format_size(self, size_bytes: int) -> str:
-        """Format file size in human readable format."""
-        if size_bytes == 0:
-            return "0 B"
-        
-        size_names = ["B", "KB", "MB", "GB"]
-        i = int(math.floor(math.log(size_bytes, 1024)))
-        p = math.pow(1024, i)
-        s = round(size_bytes / p, 2)
-        return f"{s} {size_names[i]}"
-    
-    def _format_time(self, seconds: float) -> str:
-        """Format time in MM:SS format."""
-        if seconds < 0 or math.isinf(seconds) or math.isnan(seconds):
-            return "--:--"
-        
-        minutes = int(seconds // 60)
-        seconds = int(seconds % 60)
-        return f"{minutes:02d}:{seconds:02d}"
+            if elapsed > 0:
+                speed_bps = current / elapsed
+                speed_mbps = speed_bps / (1024 * 1024)
+                eta_seconds = (total - current) / speed_bps if speed_bps > 0 else 0
+                eta_str = _format_time(eta_seconds)
+            else:
+                speed_mbps = 0
+                eta_str = "--:--"
+            
+            progress_bar = _create_progress_bar(percentage)
+            
+            progress_text = f"⚡ **TURBO TRANSFER** ⚡\n\n"
+            progress_text += f"{progress_bar}\n"
+            progress_text += f"📊 **{percentage:.1f}%** ({_format_size(current)} / {_format_size(total)})\n"
+            progress_text += f"🚀 **Speed:** {speed_mbps:.2f} MB/s\n"
+            progress_text += f"⏱️ **ETA:** {eta_str}\n"
+            progress_text += f"📡 **Streaming Telegram → cloud...**"
+            
+            self.edit(progress_text)
+            self.last_update = current_time
+            self._emitted_bytes = current
 
 class WasabiStorage:
     """High-speed Wasabi storage handler with turbo optimizations."""
@@ -121,6 +169,10 @@ class WasabiStorage:
         self.bucket = bucket
         self.region = region
         
+        # Transfer tuning, overridable per deployment region
+        max_concurrency = _env_int('WASABI_MAX_CONCURRENCY', 20)
+        multipart_chunksize = _env_int('WASABI_MULTIPART_CHUNKSIZE_MB', 16) * 1024 * 1024
+        
         # Optimized S3 client configuration for maximum speed
         self.s3_client = boto3.client(
             's3',
@@ -129,76 +181,127 @@ class WasabiStorage:
             aws_secret_access_key=secret_key,
             region_name=region,
             config=Config(
-                max_pool_connections=50,  # Increase connection pool
+                # Room for every transfer thread plus concurrent small requests
+                max_pool_connections=max(50, max_concurrency * 2),
                 retries={
                     'max_attempts': 3,
                     'mode': 'adaptive'
                 }
             )
         )
+        _tune_s3_client(self.s3_client)
         
-        # Turbo transfer configuration
-        self.transfer_config = TransferConfig(
-            multipart_threshold=1024 * 25,  # 25MB
-            max_concurrency=10,  # Concurrent uploads
-            multipart_chunksize=1024 * 25,  # 25MB chunks
-            use_threads=True
-        )
+        # Bytes per part of a streamed multipart upload
+        self.part_size = max(multipart_chunksize, MIN_PART_SIZE)
+        # S3 calls get their own threads; the loop's default executor serves the web views
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='s3')
+        # Parts held in memory across all uploads, whether queued or being sent
+        self._part_slots = asyncio.Semaphore(_env_int('WASABI_MAX_BUFFERED_PARTS', max_concurrency))
+        
+        # Signed links by (object_key, expires_in) -> (url, monotonic expiry)
+        self._url_cache: Dict[Tuple[str, int], Tuple[str, float]] = {}
+    
+    async def upload_stream(self, chunks: AsyncIterator[bytes], object_key: str) -> Optional[str]:
+        """Upload a stream of chunks as a multipart upload without touching disk."""
+        loop = asyncio.get_running_loop()
+        part_size = self.part_size
+        part_tasks = []
+        failures = []  # Exceptions from finished parts, noticed before the next part is queued
+        upload_id = None
+        
+        async def send_part(part_number: int, body: bytes) -> Dict[str, Any]:
+            response = await loop.run_in_executor(self._executor, functools.partial(
+                self.s3_client.upload_part,
+                Bucket=self.bucket,
+                Key=object_key,
+                UploadId=upload_id,
+                PartNumber=part_number,
+                Body=body
+            ))
+            return {'PartNumber': part_number, 'ETag': response['ETag']}
+        
+        def part_done(task: asyncio.Future):
+            # Called for tasks cancelled before they start as well
+            self._part_slots.release()
+            if not task.cancelled() and task.exception() is not None:
+                failures.append(task.exception())
+        
+        async def queue_part(body: bytes):
+            # Waiting here stops reading from Telegram until a buffered part is sent
+            await self._part_slots.acquire()
+            if failures:
+                # Abort now rather than reading the rest of the file first
+                self._part_slots.release()
+                raise failures[0]
+            task = asyncio.ensure_future(send_part(len(part_tasks) + 1, body))
+            task.add_done_callback(part_done)
+            part_tasks.append(task)
         
-    async def upload_file(self, file_path: str, object_key: str, progress_message=None) -> Optional[str]:
-        """Turbo-speed upload with real-time progress tracking."""
         try:
-            file_size = os.path.getsize(file_path)
-            logger.info(f"Starting turbo upload: {file_path} ({file_size} bytes)")
-            
-            # Create progress tracker
-            progress_tracker = ProgressTracker(file_size, update_interval=1.5)
-            
-            # Use high-speed multipart upload for large files
-            def upload_sync():
-                self.s3_client.upload_file(
-                    file_path,
-                    self.bucket,
-                    object_key,
-                    Config=self.transfer_config,
-                    Callback=progress_tracker
-                )
+            response = await loop.run_in_executor(self._executor, functools.partial(
+                self.s3_client.create_multipart_upload, Bucket=self.bucket, Key=object_key
+            ))
+            upload_id = response['UploadId']
+            logger.info(f"Starting turbo stream upload: {object_key}")
             
-            # Start upload in thread and monitor progress
-            upload_task = asyncio.get_event_loop().run_in_executor(None, upload_sync)
+            pending, pending_size = [], 0
+            async for chunk in chunks:
+                pending.append(chunk)
+                pending_size += len(chunk)
+                if pending_size >= part_size:
+                    await queue_part(b"".join(pending))
+                    pending, pending_size = [], 0
+            if pending or not part_tasks:
+                await queue_part(b"".join(pending))
             
-            # Monitor progress and update message
-            if progress_message:
-                while not upload_task.done():
-                    await asyncio.sleep(1.5)  # Check every 1.5 seconds
-                    current_progress = progress_tracker.get_progress()
-                    if current_progress:
-                        try:
-                            await progress_message.edit_text(current_progress)
-                        except Exception:
-                            # Handle rate limits gracefully
-                            pass
+            parts = await asyncio.gather(*part_tasks)
+            await loop.run_in_executor(self._executor, functools.partial(
+                self.s3_client.complete_multipart_upload,
+                Bucket=self.bucket,
+                Key=object_key,
+                UploadId=upload_id,
+                MultipartUpload={'Parts': parts}
+            ))
             
-            # Wait for upload to complete
-            await upload_task
-            
-            # Generate download URL
             download_url = f"https://s3.{self.region}.wasabisys.com/{self.bucket}/{object_key}"
-            logger.info(f"Turbo upload completed: {download_url}")
+            logger.info(f"Turbo stream upload completed: {download_url}")
             return download_url
             
-        except ClientError as e:
-            logger.error(f"Turbo upload failed: {e}")
-            return None
+        except Exception as e:
+            for task in part_tasks:
+                task.cancel()
+            if upload_id:
+                try:
+                    await loop.run_in_executor(self._executor, functools.partial(
+                        self.s3_client.abort_multipart_upload,
+                        Bucket=self.bucket, Key=object_key, UploadId=upload_id
+                    ))
+                except ClientError as abort_error:
+                    logger.error(f"Failed to abort stream upload: {abort_error}")
+            if isinstance(e, ClientError):
+                logger.error(f"Turbo stream upload failed: {e}")
+                return None
+            raise
     
-    async def get_download_link(self, object_key: str, expires_in: int = 3600) -> Optional[str]:
-        """Generate temporary download link for streaming."""
+    async def get_download_link(self, object_key: str, expires_in: int = 3600,
+                                refresh: bool = False) -> Optional[str]:
+        """Generate temporary download link for streaming; refresh skips the cache."""
+        cache_key = (object_key, expires_in)
+        now = time.monotonic()
+        cached = self._url_cache.get(cache_key)
+        # Reuse only while most of the lifetime is left, since callers quote it to users
+        if cached and not refresh and cached[1] > now + expires_in / 2:
+            return cached[0]
+        
         try:
             download_url = self.s3_client.generate_presigned_url(
                 'get_object',
                 Params={'Bucket': self.bucket, 'Key': object_key},
                 ExpiresIn=expires_in
             )
+            if len(self._url_cache) >= URL_CACHE_SIZE:
+                self._url_cache.pop(next(iter(self._url_cache)))
+            self._url_cache[cache_key] = (download_url, now + expires_in)
             return download_url
         except ClientError as e:
             logger.error(f"Failed to generate download link: {e}")
@@ -207,13 +310,106 @@ class WasabiStorage:
     async def delete_file(self, object_key: str) -> bool:
         """Delete file from Wasabi storage."""
         try:
-            self.s3_client.delete_object(Bucket=self.bucket, Key=object_key)
+            await asyncio.get_running_loop().run_in_executor(self._executor, functools.partial(
+                self.s3_client.delete_object, Bucket=self.bucket, Key=object_key
+            ))
             logger.info(f"File deleted: {object_key}")
             return True
         except ClientError as e:
             logger.error(f"Delete failed: {e}")
             return False
 
+class FileStore:
+    """SQLite-backed record of uploaded files, shared by the bot and web server."""
+    
+    _FIELDS = ('original_name', 'object_key', 'download_url', 'url_expires',
+               'file_size', 'upload_time', 'upload_date', 'user_id')
+    
+    def __init__(self, db_path: str):
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        # The web server reads from its own thread, so share one locked connection
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        # Bumped on every change so readers can cache derived views
+        self.version = 0
+        self._listeners: List[Callable[[], None]] = []
+        
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS files (
+                    file_id TEXT PRIMARY KEY,
+                    original_name TEXT NOT NULL,
+                    object_key TEXT NOT NULL,
+                    download_url TEXT NOT NULL DEFAULT '',
+                    url_expires REAL NOT NULL DEFAULT 0,
+                    file_size INTEGER NOT NULL,
+                    upload_time TEXT NOT NULL,
+                    upload_date TEXT NOT NULL DEFAULT '',
+                    user_id INTEGER NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS files_user_id ON files (user_id)")
+            # Counted once here and kept up to date by add(), so len() skips SQLite
+            self._count = self._conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+    
+    def _query(self, sql: str, params: tuple = ()) -> List[sqlite3.Row]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+    
+    def _to_item(self, row: sqlite3.Row) -> Tuple[str, Dict[str, Any]]:
+        return row['file_id'], {field: row[field] for field in self._FIELDS}
+    
+    def add(self, file_id: str, file_info: Dict[str, Any]):
+        """Record a newly uploaded file."""
+        columns = ('file_id',) + self._FIELDS
+        values = (file_id,) + tuple(file_info[field] for field in self._FIELDS)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT INTO files ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                values
+            )
+            self._count += 1
+            self.version += 1
+        self._notify()
+    
+    def set_download_urls(self, updates: List[Tuple[str, str, float]]):
+        """Replace signed links and their expiries (epoch seconds) as one change."""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE files SET download_url = ?, url_expires = ? WHERE file_id = ?",
+                [(download_url, url_expires, file_id) for file_id, download_url, url_expires in updates]
+            )
+            self.version += 1
+        self._notify()
+    
+    def add_listener(self, callback: Callable[[], None]):
+        """Call callback after every change to the store."""
+        self._listeners.append(callback)
+    
+    def _notify(self):
+        for callback in self._listeners:
+            callback()
+    
+    def get(self, file_id: str) -> Optional[Dict[str, Any]]:
+        """Return the stored info for a file, or None if unknown."""
+        rows = self._query("SELECT * FROM files WHERE file_id = ?", (file_id,))
+        return self._to_item(rows[0])[1] if rows else None
+    
+    def for_user(self, user_id: int) -> List[Tuple[str, Dict[str, Any]]]:
+        """Return (file_id, info) pairs for one user's files, oldest first."""
+        rows = self._query("SELECT * FROM files WHERE user_id = ? ORDER BY rowid", (user_id,))
+        return [self._to_item(row) for row in rows]
+    
+    def recent(self, limit: int) -> List[Tuple[str, Dict[str, Any]]]:
+        """Return (file_id, info) pairs for the newest files, newest first."""
+        rows = self._query("SELECT * FROM files ORDER BY rowid DESC LIMIT ?", (limit,))
+        return [self._to_item(row) for row in rows]
+    
+    def __len__(self) -> int:
+        return self._count
+
 class TelegramFileBot:
     """High-performance Telegram bot for file sharing with Wasabi storage."""
     
@@ -246,11 +442,21 @@ class TelegramFileBot:
             wasabi_region
         )
         
-        # File tracking
-        self.uploaded_files: Dict[str, Dict[str, Any]] = {}
+        # Filled in from get_me() once connected
+        self.username: Optional[str] = None
+        
+        # Event loop the bot runs on, for work submitted from other threads
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        
+        # File tracking, persisted across restarts
+        self.uploaded_files = FileStore(os.getenv('FILES_DB', 'data/files.db'))
         
-        # Rate limiting
-        self.throttler = Throttler(rate_limit=10, period=1)  # 10 operations per second
+        # Concurrent uploads allowed per user
+        self._user_sem: Dict[int, asyncio.Semaphore] = defaultdict(lambda: asyncio.Semaphore(2))
+        
+        # Pending message edits per chat, drained by _edit_worker
+        self._edit_queues: Dict[int, asyncio.Queue] = {}
+        self._edit_workers = set()  # keeps running workers referenced
         
         # Setup handlers
         self._setup_handlers()
@@ -301,7 +507,10 @@ This bot supports:
 
 Simply send any file to upload it automatically!
         """
-        await message.reply_text(welcome_text)
+        if _START_PIC:
+            await message.reply_photo(photo=_START_PIC, caption=welcome_text)
+        else:
+            await message.reply_text(welcome_text)
     
     async def handle_help(self, client, message):
         """Handle /help command."""
@@ -338,7 +547,7 @@ Simply send any file to upload it automatically!
     
     async def handle_file_upload(self, client, message):
         """Handle file upload with progress tracking."""
-        async with self.throttler:
+        async with self._user_sem[message.from_user.id]:
             try:
                 # Get file info
                 file_info = None
@@ -362,68 +571,50 @@ Simply send any file to upload it automatically!
                     return
                 
                 # Generate unique file ID and object key
-                file_id = str(uuid.uuid4())
-                original_name = getattr(file_info, 'file_name', f"file_{file_id}")
-                object_key = f"files/{message.from_user.id}/{file_id}_{original_name}"
+                file_id = secrets.token_urlsafe(9)
+                original_name = getattr(file_info, 'file_name', None) or f"file_{file_id}"
+                safe_name = _UNSAFE_NAME_CHARS.sub('_', original_name)
+                object_key = f"files/{message.from_user.id}/{file_id}_{safe_name}"
                 
-                # Send turbo download progress message
+                # Send turbo transfer progress message
                 progress_msg = await message.reply_text(
-                    "⚡ **TURBO DOWNLOAD INITIATED** ⚡\n\n"
-                    "🚀 High-speed download from Telegram...\n"
+                    "⚡ **TURBO TRANSFER INITIATED** ⚡\n\n"
+                    "🚀 Streaming from Telegram straight to cloud storage...\n"
                     "📡 Optimizing transfer protocols..."
                 )
                 
-                # Create downloads directory
-                downloads_dir = Path("downloads")
-                downloads_dir.mkdir(exist_ok=True)
-                local_file_path = downloads_dir / f"{file_id}_{original_name}"
-                
-                # Turbo download from Telegram with progress tracking
+                # Stream from Telegram to Wasabi with real-time progress
                 start_time = time.time()
-                await self._turbo_download_media(
-                    message, str(local_file_path), progress_msg, file_size
+                uploaded = await self._turbo_stream_media(
+                    message, object_key, progress_msg, file_size
                 )
-                download_time = time.time() - start_time
+                transfer_time = time.time() - start_time
+                transfer_speed = (file_size / transfer_time) / (1024 * 1024) if transfer_time > 0 else 0
                 
-                # Show download completion with speed stats
-                download_speed = (file_size / download_time) / (1024 * 1024) if download_time > 0 else 0
-                await progress_msg.edit_text(
-                    f"✅ **TURBO DOWNLOAD COMPLETE** ⚡\n\n"
-                    f"📁 **File:** {original_name}\n"
-                    f"📊 **Size:** {self._format_file_size(file_size)}\n"
-                    f"🚀 **Speed:** {download_speed:.2f} MB/s\n"
-                    f"⏱️ **Time:** {download_time:.1f}s\n\n"
-                    f"☁️ **Initializing cloud upload...**"
-                )
-                
-                # Turbo upload initialization already handled in download completion
-                
-                # Upload to Wasabi with real-time progress
-                download_url = await self.storage.upload_file(
-                    str(local_file_path),
-                    object_key,
-                    progress_message=progress_msg
-                )
-                
-                if download_url:
-                    # Store file info
-                    self.uploaded_files[file_id] = {
+                if uploaded:
+                    # Sign the streaming link now so the web page can link straight to Wasabi
+                    streaming_url = await self.storage.get_download_link(object_key, expires_in=LINK_TTL)
+                    
+                    # Store file info; an empty link is re-signed by the refresh task
+                    upload_time = datetime.now()
+                    self.uploaded_files.add(file_id, {
                         'original_name': original_name,
                         'object_key': object_key,
-                        'download_url': download_url,
+                        'download_url': streaming_url or '',
+                        'url_expires': time.time() + LINK_TTL if streaming_url else 0,
                         'file_size': file_size,
-                        'upload_time': datetime.now().isoformat(),
+                        'upload_time': upload_time.isoformat(),
+                        'upload_date': upload_time.date().isoformat(),
                         'user_id': message.from_user.id
-                    }
-                    
-                    # Generate streaming link
-                    streaming_url = await self.storage.get_download_link(object_key, expires_in=86400)  # 24 hours
+                    })
                     
                     success_text = f"""
 ✅ **TURBO UPLOAD COMPLETE!** ⚡
 
 📁 **File:** {original_name}
-📊 **Size:** {self._format_file_size(file_size)}
+📊 **Size:** {_format_size(file_size)}
+🚀 **Speed:** {transfer_speed:.2f} MB/s
+⏱️ **Time:** {transfer_time:.1f}s
 🆔 **File ID:** `{file_id}`
 
 🔗 **High-Speed Streaming Link:** 
@@ -437,15 +628,9 @@ Simply send any file to upload it automatically!
 ⬇️ **Get Link Again:** /download {file_id}
                     """
                     
-                    await progress_msg.edit_text(success_text)
-                    
-                    # Clean up local file
-                    try:
-                        os.remove(local_file_path)
-                    except:
-                        pass
+                    self._queue_edit(progress_msg, success_text)
                 else:
-                    await progress_msg.edit_text("❌ Upload failed. Please try again.")
+                    self._queue_edit(progress_msg, "❌ Upload failed. Please try again.")
                     
             except Exception as e:
                 logger.error(f"Upload error: {e}")
@@ -453,25 +638,21 @@ Simply send any file to upload it automatically!
     
     async def handle_list_files(self, client, message):
         """Handle /list command to show user's uploaded files."""
-        user_files = [
-            f for f in self.uploaded_files.values() 
-            if f['user_id'] == message.from_user.id
-        ]
+        parts = []
+        for file_id, file_info in self.uploaded_files.for_user(message.from_user.id):
+            parts.append(
+                f"📁 **{file_info['original_name']}**\n"
+                f"🆔 ID: `{file_id}`\n"
+                f"📊 Size: {_format_size(file_info['file_size'])}\n"
+                f"📅 Uploaded: {file_info['upload_date']}\n"
+                f"⬇️ Download: /download {file_id}\n\n"
+            )
         
-        if not user_files:
+        if not parts:
             await message.reply_text("📁 No files uploaded yet.\n\nSend me any file to get started!")
             return
         
-        files_text = "📋 **Your Uploaded Files:**\n\n"
-        for file_id, file_info in self.uploaded_files.items():
-            if file_info['user_id'] == message.from_user.id:
-                files_text += f"📁 **{file_info['original_name']}**\n"
-                files_text += f"🆔 ID: `{file_id}`\n"
-                files_text += f"📊 Size: {self._format_file_size(file_info['file_size'])}\n"
-                files_text += f"📅 Uploaded: {file_info['upload_time'][:10]}\n"
-                files_text += f"⬇️ Download: /download {file_id}\n\n"
-        
-        await message.reply_text(files_text)
+        await message.reply_text("📋 **Your Uploaded Files:**\n\n" + "".join(parts))
     
     async def handle_download_command(self, client, message):
         """Handle /download command."""
@@ -482,24 +663,23 @@ Simply send any file to upload it automatically!
                 return
             
             file_id = command_parts[1]
-            if file_id not in self.uploaded_files:
+            file_info = self.uploaded_files.get(file_id)
+            if file_info is None:
                 await message.reply_text("❌ File not found. Use /list to see available files.")
                 return
             
-            file_info = self.uploaded_files[file_id]
-            
             # Generate fresh streaming link
             streaming_url = await self.storage.get_download_link(
                 file_info['object_key'], 
-                expires_in=86400  # 24 hours
+                expires_in=LINK_TTL
             )
             
             if streaming_url:
                 download_text = f"""
 📁 **{file_info['original_name']}**
-📊 **Size:** {self._format_file_size(file_info['file_size'])}
+📊 **Size:** {_format_size(file_info['file_size'])}
 
-🔗 **Streaming Link (24h):**
+🔗 **Streaming Link (valid 12h+):**
 `{streaming_url}`
 
 📱 **For Mobile Players:**
@@ -518,106 +698,92 @@ Simply send any file to upload it automatically!
             logger.error(f"Download error: {e}")
             await message.reply_text("❌ Error generating download link.")
     
-    async def _turbo_download_media(self, message, file_path: str, progress_msg, file_size: int):
-        """Turbo-speed download with real-time progress tracking."""
-        try:
-            # Create progress tracker for download
-            class DownloadProgress:
-                def __init__(self, total_size, progress_message):
-                    self.total_size = total_size
-                    self.progress_message = progress_message
-                    self.downloaded = 0
-                    self.start_time = time.time()
-                    self.last_update = 0
-                
-                async def update(self, current, total):
-                    self.downloaded = current
-                    current_time = time.time()
-                    
-                    # Update every 1.5 seconds
-                    if current_time - self.last_update > 1.5:
-                        percentage = (current / total) * 100
-                        elapsed = current_time - self.start_time
-                        
-                        if elapsed > 0:
-                            speed_bps = current / elapsed
-                            speed_mbps = speed_bps / (1024 * 1024)
-                            eta_seconds = (total - current) / speed_bps if speed_bps > 0 else 0
-                            eta_str = self._format_time(eta_seconds)
-                        else:
-                            speed_mbps = 0
-                            eta_str = "--:--"
-                        
-                        progress_bar = self._create_download_progress_bar(percentage)
-                        
-                        progress_text = f"⚡ **TURBO DOWNLOAD** ⚡\n\n"
-                        progress_text += f"{progress_bar}\n"
-                        progress_text += f"📊 **{percentage:.1f}%** ({self._format_size(current)} / {self._format_size(total)})\n"
-                        progress_text += f"🚀 **Speed:** {speed_mbps:.2f} MB/s\n"
-                        progress_text += f"⏱️ **ETA:** {eta_str}\n"
-                        progress_text += f"📡 **High-speed Telegram download...**"
-                        
-                        try:
-                            await self.progress_message.edit_text(progress_text)
-                        except Exception:
-                            pass
-                        
-                        self.last_update = current_time
-                
-                def _format_size(self, size_bytes: int) -> str:
-                    if size_bytes == 0:
-                        return "0 B"
-                    size_names = ["B", "KB", "MB", "GB"]
-                    import math
-                    i = int(math.floor(math.log(size_bytes, 1024)))
-                    p = math.pow(1024, i)
-                    s = round(size_bytes / p, 2)
-                    return f"{s} {size_names[i]}"
-                
-                def _format_time(self, seconds: float) -> str:
-                    if seconds < 0 or math.isinf(seconds) or math.isnan(seconds):
-                        return "--:--"
-                    minutes = int(seconds // 60)
-                    seconds = int(seconds % 60)
-                    return f"{minutes:02d}:{seconds:02d}"
-                
-                def _create_download_progress_bar(self, percentage: float, length: int = 20) -> str:
-                    filled = int(percentage / 100 * length)
-                    bar = "█" * filled + "░" * (length - filled)
-                    return f"[{bar}] {percentage:.1f}%"
+    def _queue_edit(self, message, text: str):
+        """Queue an edit of message; only its newest pending text is sent."""
+        chat_id = message.chat.id
+        queue = self._edit_queues.get(chat_id)
+        if queue is None:
+            queue = self._edit_queues[chat_id] = asyncio.Queue()
+            worker = asyncio.create_task(self._edit_worker(chat_id, queue))
+            self._edit_workers.add(worker)
+            worker.add_done_callback(self._edit_workers.discard)
+        queue.put_nowait((message, text))
+    
+    async def _edit_worker(self, chat_id: int, queue: asyncio.Queue):
+        """Send queued edits for one chat, at most one per second."""
+        retry = {}
+        while True:
+            # Coalesce everything queued so far down to the newest text per message
+            latest, retry = retry, {}
+            while not queue.empty():
+                message, text = queue.get_nowait()
+                latest[message.id] = (message, text)
+            if not latest:
+                del self._edit_queues[chat_id]
+                return
             
+            for message, text in latest.values():
+                try:
+                    await message.edit_text(text)
+                except FloodWait as e:
+                    # Retry next round unless a newer text is queued by then
+                    retry[message.id] = (message, text)
+                    await asyncio.sleep(e.value)
+                    continue
+                except Exception as e:
+                    logger.warning(f"Failed to edit message: {e}")
+                await asyncio.sleep(1.0)
+    
+    async def _turbo_stream_media(self, message, object_key: str, progress_msg, file_size: int) -> Optional[str]:
+        """Turbo-speed stream from Telegram to Wasabi with real-time progress tracking."""
+        try:
             # Create progress tracker
-            progress_tracker = DownloadProgress(file_size, progress_msg)
-            
-            # Download with progress callback
-            await self.app.download_media(
-                message,
-                file_name=file_path,
-                progress=progress_tracker.update
+            progress_tracker = DownloadProgress(
+                file_size, functools.partial(self._queue_edit, progress_msg)
             )
             
+            async def chunks():
+                current = 0
+                async for chunk in self.app.stream_media(message):
+                    current += len(chunk)
+                    await progress_tracker.update(current, file_size or current)
+                    yield chunk
+            
+            # Hand Telegram's chunks straight to the multipart upload
+            return await self.storage.upload_stream(chunks(), object_key)
+            
         except Exception as e:
-            logger.error(f"Turbo download error: {e}")
+            logger.error(f"Turbo stream error: {e}")
             raise e
 
-    def _format_file_size(self, size_bytes: int) -> str:
-        """Format file size in human readable format."""
-        if size_bytes == 0:
-            return "0 B"
-        
-        size_names = ["B", "KB", "MB", "GB"]
-        import math
-        i = int(math.floor(math.log(size_bytes, 1024)))
-        p = math.pow(1024, i)
-        s = round(size_bytes / p, 2)
-        return f"{s} {size_names[i]}"
+    async def _refresh_download_links(self):
+        """Re-sign the web page's streaming links before they expire."""
+        while True:
+            try:
+                # Older files drop off the page; /stream signs their links on demand
+                deadline = time.time() + LINK_REFRESH_WINDOW
+                updates = []
+                for file_id, file_info in self.uploaded_files.recent(RECENT_FILES):
+                    if file_info['url_expires'] >= deadline:
+                        continue
+                    streaming_url = await self.storage.get_download_link(
+                        file_info['object_key'], expires_in=LINK_TTL, refresh=True
+                    )
+                    if streaming_url:
+                        updates.append((file_id, streaming_url, time.time() + LINK_TTL))
+                if updates:
+                    self.uploaded_files.set_download_urls(updates)
+            except Exception:
+                logger.exception("Failed to refresh download links")
+            await asyncio.sleep(LINK_REFRESH_INTERVAL)
     
     async def run(self):
         """Start the bot."""
         logger.info("Starting Telegram File Bot...")
+        self.loop = asyncio.get_running_loop()
         
         # Create session directory
-        os.makedirs("session", exist_ok=True)
+        await aiofiles.os.makedirs("session", exist_ok=True)
         
         try:
             await self.app.start()
@@ -625,16 +791,169 @@ Simply send any file to upload it automatically!
             
             # Send startup message to log
             me = await self.app.get_me()
+            self.username = me.username
             logger.info(f"Bot @{me.username} is running...")
             
+            # Keep the web page's direct links valid
+            refresh_task = asyncio.create_task(self._refresh_download_links())
+            
             # Keep the bot running
-            await asyncio.Event().wait()
+            try:
+                await asyncio.Event().wait()
+            finally:
+                refresh_task.cancel()
             
         except Exception as e:
             logger.error(f"Failed to start bot: {e}")
         finally:
             await self.app.stop()
 
+# Default shown until the bot has logged in and knows its own username
+DEFAULT_BOT_USERNAME = "mraprguildbot"
+
+# Home page; {bot_username} is filled in with bytes.replace, not str.format
+INDEX_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+    <title>🚀 High-Speed File Bot</title>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <style>
+        body {
+            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
+            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+            margin: 0;
+            padding: 20px;
+            min-height: 100vh;
+            color: white;
+        }
+        .container {
+            max-width: 800px;
+            margin: 0 auto;
+            text-align: center;
+            padding: 40px 20px;
+        }
+        .hero {
+            background: rgba(255,255,255,0.1);
+            border-radius: 20px;
+            padding: 40px;
+            backdrop-filter: blur(10px);
+            border: 1px solid rgba(255,255,255,0.2);
+            margin-bottom: 40px;
+        }
+        .feature {
+            display: inline-block;
+            margin: 10px 20px;
+            padding: 15px 25px;
+            background: rgba(255,255,255,0.2);
+            border-radius: 25px;
+            font-size: 16px;
+        }
+        .files-section {
+            background: rgba(255,255,255,0.1);
+            border-radius: 20px;
+            padding: 30px;
+            backdrop-filter: blur(10px);
+            border: 1px solid rgba(255,255,255,0.2);
+        }
+        .file-item {
+            background: rgba(255,255,255,0.2);
+            margin: 10px 0;
+            padding: 15px;
+            border-radius: 10px;
+            text-align: left;
+        }
+        .file-link {
+            color: #00ff88;
+            text-decoration: none;
+            font-weight: bold;
+        }
+        .file-link:hover {
+            text-decoration: underline;
+        }
+        h1 { font-size: 3em; margin-bottom: 20px; }
+        h2 { color: #00ff88; }
+    </style>
+</head>
+<body>
+    <div class="container">
+        <div class="hero">
+            <h1>🚀 High-Speed File Bot</h1>
+            <p style="font-size: 1.2em;">Ultra-fast file sharing with Wasabi cloud storage</p>
+
+            <div style="margin: 30px 0;">
+                <span class="feature">⚡ Turbo Upload Speed</span>
+                <span class="feature">📱 MX Player Compatible</span>
+                <span class="feature">🌐 Direct Streaming</span>
+                <span class="feature">☁️ 4GB File Support</span>
+            </div>
+
+            <p>Start chatting with <strong>@{bot_username}</strong> on Telegram</p>
+        </div>
+
+        <div class="files-section">
+            <h2>📋 Recent Files</h2>
+            <div id="files-list">
+                <p>Upload files through Telegram to see them here!</p>
+            </div>
+        </div>
+    </div>
+
+    <script>
+        function renderFiles(data) {
+            const filesList = document.getElementById('files-list');
+            if (data.files && data.files.length > 0) {
+                filesList.innerHTML = data.files.map(file => `
+                    <div class="file-item">
+                        <strong>${file.name}</strong> (${file.size})
+                        <br>
+                        <a href="${file.streaming_url}" class="file-link" target="_blank">
+                            🎥 Stream/Download
+                        </a>
+                        <small style="color: #ccc; margin-left: 20px;">
+                            ID: ${file.id} | Uploaded: ${file.date}
+                        </small>
+                    </div>
+                `).join('');
+            } else {
+                filesList.innerHTML = '<p>No files uploaded yet. Send files to the Telegram bot!</p>';
+            }
+        }
+
+        // The server pushes the files list whenever it changes
+        new EventSource('/events').onmessage = event => renderFiles(JSON.parse(event.data));
+    </script>
+</body>
+</html>
+"""
+
+@functools.lru_cache(maxsize=1)
+def _server_time(epoch_sec: int) -> str:
+    """Format a whole-second timestamp; repeat calls within the second hit the cache."""
+    return datetime.fromtimestamp(epoch_sec).isoformat()
+
+def _nonempty_body(wsgi_app):
+    """Make wsgi_app yield at least one chunk for every response."""
+    # hypercorn's WSGI adapter sends the status and headers with the first
+    # body chunk, so an empty body (HEAD, 304) never started the response
+    def app(environ, start_response):
+        body = wsgi_app(environ, start_response)
+        try:
+            empty = True
+            for chunk in body:
+                empty = False
+                yield chunk
+            if empty:
+                yield b""
+        finally:
+            if hasattr(body, 'close'):
+                body.close()
+    return app
+
+def _json_response(obj: Any, status: int = 200) -> Response:
+    """Serialize obj with orjson into a JSON response."""
+    return Response(orjson.dumps(obj), status=status, mimetype='application/json')
+
 class WebServer:
     """Flask web server for file rendering and access on port 5000."""
     
@@ -644,176 +963,184 @@ class WebServer:
         self.app.config['SECRET_KEY'] = 'high-speed-file-bot-2024'
         CORS(self.app)
         
+        # The home page only changes once the bot learns its username
+        self._index_template = INDEX_TEMPLATE.encode('utf-8')
+        self._index_username = None
+        self._index_bytes = b""
+        
+        # (files version, encoded /api/files body)
+        self._files_cache = (None, None)
+        # The version restarts at 0 with the process, so tag ETags per process
+        self._etag_prefix = secrets.token_hex(4)
+        
+        # One event per open /events stream, set when the file list changes
+        self._subscribers = set()
+        self._loop = None
+        self.bot.uploaded_files.add_listener(self._files_changed)
+        self._wsgi = AsyncioWSGIMiddleware(_nonempty_body(self.app))
+        
         # Setup routes
         self._setup_routes()
     
+    def _files_body(self, version: int) -> bytes:
+        """Return the encoded /api/files body, rebuilding it only when the version moves."""
+        cached_version, body = self._files_cache
+        if cached_version == version:
+            return body
+        
+        # Rows come back newest first, already limited to the page's files
+        files_data = []
+        for file_id, file_info in self.bot.uploaded_files.recent(RECENT_FILES):
+            files_data.append({
+                'id': file_id,
+                'name': file_info['original_name'],
+                'size': _format_size(file_info['file_size']),
+                'date': file_info['upload_date'],
+                # Signed Wasabi link; /stream only if signing failed
+                'streaming_url': file_info['download_url'] or f"/stream/{file_id}"
+            })
+        
+        body = orjson.dumps({
+            'status': 'success',
+            'files': files_data
+        })
+        self._files_cache = (version, body)
+        return body
+    
+    def _files_changed(self):
+        if self._loop is not None:
+            for changed in self._subscribers:
+                self._loop.call_soon_threadsafe(changed.set)
+    
+    def _files_etag(self, version: int) -> str:
+        return f"{self._etag_prefix}-{version}"
+    
+    def _files_not_modified(self, scope) -> bool:
+        """Whether a GET of /api/files already holds the current version."""
+        if scope['path'] != '/api/files' or scope['method'] not in ('GET', 'HEAD'):
+            return False
+        for name, value in scope['headers']:
+            if name == b'if-none-match':
+                etags = parse_etags(value.decode('latin-1'))
+                return etags.contains_weak(self._files_etag(self.bot.uploaded_files.version))
+        return False
+    
+    async def _asgi(self, scope, receive, send):
+        """Serve /events and idle /api/files polls natively; everything else goes through Flask."""
+        if scope['type'] == 'http' and scope['path'] == '/events':
+            await self._stream_events(receive, send)
+        elif scope['type'] == 'http' and self._files_not_modified(scope):
+            # Answered on the loop, without waiting for an executor thread
+            etag = self._files_etag(self.bot.uploaded_files.version)
+            await send({
+                'type': 'http.response.start',
+                'status': 304,
+                'headers': [
+                    (b'etag', f'W/"{etag}"'.encode('latin-1')),
+                    (b'cache-control', FILES_CACHE_CONTROL.encode('latin-1')),
+                ],
+            })
+            await send({'type': 'http.response.body', 'body': b''})
+        else:
+            await self._wsgi(scope, receive, send)
+    
+    async def _stream_events(self, receive, send):
+        """Push the /api/files body to one client whenever the file list changes."""
+        changed = asyncio.Event()
+        changed.set()  # Start with the current list
+        self._subscribers.add(changed)
+        
+        async def wait_disconnect():
+            while (await receive())['type'] != 'http.disconnect':
+                pass
+        
+        disconnected = asyncio.create_task(wait_disconnect())
+        try:
+            await send({
+                'type': 'http.response.start',
+                'status': 200,
+                'headers': [
+                    (b'content-type', b'text/event-stream'),
+                    (b'cache-control', b'no-cache'),
+                ],
+            })
+            while not disconnected.done():
+                try:
+                    await asyncio.wait_for(changed.wait(), SSE_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    chunk = b": keepalive\n\n"
+                else:
+                    changed.clear()
+                    chunk = b"data: " + self._files_body(self.bot.uploaded_files.version) + b"\n\n"
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+        finally:
+            self._subscribers.discard(changed)
+            disconnected.cancel()
+    
     def _setup_routes(self):
         """Setup Flask routes for web interface."""
         
         @self.app.route('/')
         def home():
             """Home page showing bot information."""
-            return f'''
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <title>🚀 High-Speed File Bot</title>
-                <meta charset="UTF-8">
-                <meta name="viewport" content="width=device-width, initial-scale=1.0">
-                <style>
-                    body {{
-                        font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
-                        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                        margin: 0;
-                        padding: 20px;
-                        min-height: 100vh;
-                        color: white;
-                    }}
-                    .container {{
-                        max-width: 800px;
-                        margin: 0 auto;
-                        text-align: center;
-                        padding: 40px 20px;
-                    }}
-                    .hero {{
-                        background: rgba(255,255,255,0.1);
-                        border-radius: 20px;
-                        padding: 40px;
-                        backdrop-filter: blur(10px);
-                        border: 1px solid rgba(255,255,255,0.2);
-                        margin-bottom: 40px;
-                    }}
-                    .feature {{
-                        display: inline-block;
-                        margin: 10px 20px;
-                        padding: 15px 25px;
-                        background: rgba(255,255,255,0.2);
-                        border-radius: 25px;
-                        font-size: 16px;
-                    }}
-                    .files-section {{
-                        background: rgba(255,255,255,0.1);
-                        border-radius: 20px;
-                        padding: 30px;
-                        backdrop-filter: blur(10px);
-                        border: 1px solid rgba(255,255,255,0.2);
-                    }}
-                    .file-item {{
-                        background: rgba(255,255,255,0.2);
-                        margin: 10px 0;
-                        padding: 15px;
-                        border-radius: 10px;
-                        text-align: left;
-                    }}
-                    .file-link {{
-                        color: #00ff88;
-                        text-decoration: none;
-                        font-weight: bold;
-                    }}
-                    .file-link:hover {{
-                        text-decoration: underline;
-                    }}
-                    h1 {{ font-size: 3em; margin-bottom: 20px; }}
-                    h2 {{ color: #00ff88; }}
-                </style>
-            </head>
-            <body>
-                <div class="container">
-                    <div class="hero">
-                        <h1>🚀 High-Speed File Bot</h1>
-                        <p style="font-size: 1.2em;">Ultra-fast file sharing with Wasabi cloud storage</p>
-                        
-                        <div style="margin: 30px 0;">
-                            <span class="feature">⚡ Turbo Upload Speed</span>
-                            <span class="feature">📱 MX Player Compatible</span>
-                            <span class="feature">🌐 Direct Streaming</span>
-                            <span class="feature">☁️ 4GB File Support</span>
-                        </div>
-                        
-                        <p>Start chatting with <strong>@mraprguildbot</strong> on Telegram</p>
-                    </div>
-                    
-                    <div class="files-section">
-                        <h2>📋 Recent Files</h2>
-                        <div id="files-list">
-                            <p>Upload files through Telegram to see them here!</p>
-                        </div>
-                    </div>
-                </div>
-                
-                <script>
-                    // Auto-refresh files list
-                    setInterval(() => {{
-                        fetch('/api/files')
-                            .then(response => response.json())
-                            .then(data => {{
-                                const filesList = document.getElementById('files-list');
-                                if (data.files && data.files.length > 0) {{
-                                    filesList.innerHTML = data.files.map(file => `
-                                        <div class="file-item">
-                                            <strong>${{file.name}}</strong> (${{file.size}})
-                                            <br>
-                                            <a href="${{file.streaming_url}}" class="file-link" target="_blank">
-                                                🎥 Stream/Download
-                                            </a>
-                                            <small style="color: #ccc; margin-left: 20px;">
-                                                ID: ${{file.id}} | Uploaded: ${{file.date}}
-                                            </small>
-                                        </div>
-                                    `).join('');
-                                }} else {{
-                                    filesList.innerHTML = '<p>No files uploaded yet. Send files to the Telegram bot!</p>';
-                                }}
-                            }})
-                            .catch(err => console.log('Error fetching files:', err));
-                    }}, 5000);
-                </script>
-            </body>
-            </html>
-            '''
+            username = self.bot.username or DEFAULT_BOT_USERNAME
+            if username != self._index_username:
+                self._index_bytes = self._index_template.replace(
+                    b"{bot_username}", username.encode('utf-8')
+                )
+                self._index_username = username
+            # Don't let caches keep the placeholder username past login
+            cache_control = 'public, max-age=3600' if self.bot.username else 'no-cache'
+            return Response(
+                self._index_bytes,
+                mimetype='text/html',
+                headers={'Cache-Control': cache_control}
+            )
         
         @self.app.route('/api/files')
         def api_files():
             """API endpoint to get list of uploaded files."""
             try:
-                files_data = []
-                for file_id, file_info in self.bot.uploaded_files.items():
-                    files_data.append({
-                        'id': file_id,
-                        'name': file_info['original_name'],
-                        'size': self._format_file_size(file_info['file_size']),
-                        'date': file_info['upload_time'][:10],
-                        'streaming_url': file_info.get('download_url', '#')
-                    })
-                
-                # Sort by upload time (newest first)
-                files_data.sort(key=lambda x: x['date'], reverse=True)
-                
-                return jsonify({
-                    'status': 'success',
-                    'files': files_data[:20]  # Limit to 20 most recent
-                })
+                # Polls that already hold this version get an empty 304
+                version = self.bot.uploaded_files.version
+                etag = self._files_etag(version)
+                if request.if_none_match.contains_weak(etag):
+                    response = Response(status=304)
+                else:
+                    response = Response(self._files_body(version), mimetype='application/json')
+                response.set_etag(etag, weak=True)
+                response.headers['Cache-Control'] = FILES_CACHE_CONTROL
+                return response
             except Exception as e:
-                return jsonify({
+                return _json_response({
                     'status': 'error',
                     'message': str(e)
                 })
         
         @self.app.route('/stream/<file_id>')
         def stream_file(file_id):
-            """Stream file directly from Wasabi storage."""
+            """Fallback redirect for links not taken straight from /api/files."""
             try:
-                if file_id not in self.bot.uploaded_files:
+                file_info = self.bot.uploaded_files.get(file_id)
+                if file_info is None:
                     return "File not found", 404
                 
-                file_info = self.bot.uploaded_files[file_id]
-                # Generate streaming URL
-                streaming_url = asyncio.run(
+                # The link signed at upload is kept fresh by the bot
+                if file_info['url_expires'] > time.time() + LINK_REFRESH_WINDOW:
+                    return redirect(file_info['download_url'])
+                
+                if self.bot.loop is None:
+                    return "Bot is starting, try again shortly", 503
+                
+                # Generate streaming URL on the bot's running loop
+                future = asyncio.run_coroutine_threadsafe(
                     self.bot.storage.get_download_link(
                         file_info['object_key'], 
                         expires_in=3600
-                    )
+                    ),
+                    self.bot.loop
                 )
+                streaming_url = future.result(timeout=10)
                 
                 if streaming_url:
                     # Redirect to Wasabi streaming URL
@@ -827,39 +1154,26 @@ class WebServer:
         @self.app.route('/health')
         def health():
             """Health check endpoint."""
-            return jsonify({
+            return _json_response({
                 'status': 'healthy',
                 'bot_running': True,
                 'files_count': len(self.bot.uploaded_files),
-                'server_time': datetime.now().isoformat()
+                'server_time': _server_time(int(time.time()))
             })
     
-    def _format_file_size(self, size_bytes: int) -> str:
-        """Format file size in human readable format."""
-        if size_bytes == 0:
-            return "0 B"
-        
-        size_names = ["B", "KB", "MB", "GB"]
-        import math
-        i = int(math.floor(math.log(size_bytes, 1024)))
-        p = math.pow(1024, i)
-        s = round(size_bytes / p, 2)
-        return f"{s} {size_names[i]}"
-    
-    def run(self):
-        """Run the Flask web server."""
+    async def run(self, shutdown_trigger: Optional[Callable[[], Any]] = None):
+        """Serve the Flask app on the running event loop until shutdown_trigger returns."""
         logger.info("🌐 Starting web server on port 5000...")
-        self.app.run(host='0.0.0.0', port=5000, debug=False, threaded=True)
+        self._loop = asyncio.get_running_loop()
+        config = HypercornConfig()
+        config.bind = ['0.0.0.0:5000']
+        # Flask views stay synchronous; the middleware runs them in the loop's executor
+        await serve(self._asgi, config, shutdown_trigger=shutdown_trigger)
 
 async def run_bot(bot):
     """Run the Telegram bot."""
     await bot.run()
 
-def run_web_server(bot):
-    """Run the web server."""
-    web_server = WebServer(bot)
-    web_server.run()
-
 async def main():
     """Main function to run both bot and web server."""
     # Check required environment variables
@@ -869,20 +1183,41 @@ async def main():
         'WASABI_BUCKET', 'WASABI_REGION'
     ]
     
-    missing_vars = [var for var in required_vars if not os.getenv(var)]
+    env = os.environ
+    missing_vars = [var for var in required_vars if not env.get(var)]
     if missing_vars:
         logger.error(f"Missing environment variables: {', '.join(missing_vars)}")
-        return
+        # Exit non-zero so supervisors see the failed start
+        sys.exit(1)
     
     # Initialize bot
     bot = TelegramFileBot()
     
-    # Start web server in separate thread
-    web_thread = threading.Thread(target=run_web_server, args=(bot,), daemon=True)
-    web_thread.start()
+    web_server = WebServer(bot)
+    
+    # One trigger for both, so a signal stops the bot and not just hypercorn
+    shutdown = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, shutdown.set)
+    
+    # Run bot and web server on the same event loop; when either ends, stop the other
+    tasks = [
+        asyncio.create_task(run_bot(bot)),
+        asyncio.create_task(web_server.run(shutdown.wait)),
+    ]
+    done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    for task in pending:
+        task.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
     
-    # Run bot in main thread
-    await run_bot(bot)
+    for task in done:
+        if not task.cancelled() and task.exception():
+            logger.error(f"Service failed: {task.exception()}")
+    if not shutdown.is_set():
+        # The bot or web server stopped on its own; let supervisors restart us
+        logger.error("Service stopped unexpectedly, exiting")
+        sys.exit(1)
 
 if __name__ == "__main__":
     asyncio.run(main())